@@ -7,12 +7,12 @@ Quick analysis for OpenReview crawl outputs (JSONL).
 Reads JSONL files in --indir and writes CSVs + Markdown report to --outdir.
 
 Outputs:
-  - reviews_by_paper.csv
+  - reviews_by_paper.csv (+ .parquet when pyarrow is installed)
   - reviews_per_paper_distribution.csv
   - rating_summary.csv (if rating-like fields exist)
   - review_length_summary.csv
   - decision_breakdown.csv (if decisions exist)
-  - reviews_enriched.csv (word count, reply flags)
+  - reviews_enriched.csv (word count, reply flags; + .parquet when pyarrow is installed)
   - threads_by_paper.csv (thread stats per paper)
   - sample_threads.md (example threads)
   - summary.md  (human-friendly report)
@@ -20,45 +20,206 @@ Outputs:
 from __future__ import annotations
 
 import argparse
+import io
+import json
 import os
 import re
 import sys
-from collections import defaultdict, deque
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit
+except ImportError:  # optional, the decorated helpers also run as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+try:
+    import pyarrow as pa
+    from pyarrow import json as paj
+except ImportError:  # optional, see read_jsonl
+    pa = paj = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # optional, see write_parquet
+    pq = None
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # optional, stdlib json is a drop-in (slower) fallback
+    _json_loads = json.loads
+
+
+_WORD_RE = re.compile(r"\w+")
+_WS_RE = re.compile(r"\s+")
+_NUM_RE = re.compile(r"([0-9]+(?:\.[0-9]+)?)")
+
 
 # ---------- utils ----------
-def read_jsonl(p: Path) -> pd.DataFrame:
-    if not p.exists():
-        return pd.DataFrame()
-    try:
-        return pd.read_json(p, lines=True, dtype_backend="pyarrow")
-    except Exception:
-        return pd.read_json(p, lines=True)
+def _wants(fields: Optional[Iterable[str]]):
+    """Build a key filter from names; a trailing `*` matches by prefix (e.g. `content.*`)."""
+    if fields is None:
+        return lambda k: True
+    exact = {f for f in fields if not f.endswith("*")}
+    prefixes = tuple(f[:-1] for f in fields if f.endswith("*"))
+    return lambda k: k in exact or (bool(prefixes) and k.startswith(prefixes))
 
 
-def extract_numeric_rating(x) -> Optional[float]:
-    """Extract leading numeric (e.g. 7 from '7: Accept')."""
-    if pd.isna(x):
-        return None
-    if isinstance(x, (int, float)):
+def read_jsonl(p: Path, fields: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Load a JSONL file keeping only `fields` (all keys if None).
+    A nested `content` dict is flattened to `content.<key>` columns.
+    Uses pyarrow's multithreaded JSON reader when available and falls back
+    to line-by-line parsing for files it rejects (e.g. inconsistent types).
+    """
+    if not p.exists():
+        return pd.DataFrame()
+    wanted = _wants(fields)
+    if paj is not None:
         try:
-            return float(x)
+            return _read_jsonl_arrow(p, wanted)
         except Exception:
-            return None
-    s = str(x)
-    m = re.search(r"([0-9]+(?:\.[0-9]+)?)", s)
-    return float(m.group(1)) if m else None
+            pass
+    return _read_jsonl_stream(p, wanted)
+
+
+def _untimestamped(t):
+    """`t` with every timestamp/date (also nested in structs/lists) replaced by string."""
+    if pa.types.is_timestamp(t) or pa.types.is_date(t):
+        return pa.string()
+    if pa.types.is_struct(t):
+        return pa.struct([f.with_type(_untimestamped(f.type)) for f in t])
+    if pa.types.is_list(t):
+        return pa.list_(t.value_field.with_type(_untimestamped(t.value_type)))
+    return t
+
+
+def _read_jsonl_arrow(p: Path, wanted) -> pd.DataFrame:
+    opts = paj.ReadOptions(use_threads=True, block_size=1 << 22)
+    table = paj.read_json(str(p), read_options=opts)
+    # the reader turns date-like strings into timestamps; re-read those fields
+    # as plain text so results match the line-by-line path
+    schema = pa.schema([f.with_type(_untimestamped(f.type)) for f in table.schema])
+    if not schema.equals(table.schema):
+        table = paj.read_json(str(p), read_options=opts,
+                              parse_options=paj.ParseOptions(explicit_schema=schema))
+    table = table.flatten()
+    table = table.select([c for c in table.column_names if wanted(c)])
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _read_jsonl_stream(p: Path, wanted) -> pd.DataFrame:
+    cols: Dict[str, list] = {}
+    n = 0
+    with p.open("rb") as f:
+        for line in f:
+            line = line.strip().removeprefix(b"\xef\xbb\xbf")
+            if not line:
+                continue
+            obj = _json_loads(line)
+            content = obj.pop("content", None)
+            if isinstance(content, dict):
+                obj.update((f"content.{k}", v) for k, v in content.items())
+            elif content is not None:
+                obj["content"] = content
+            for k, v in obj.items():
+                if not wanted(k):
+                    continue
+                col = cols.get(k)
+                if col is None:
+                    col = cols[k] = [None] * n
+                col.append(v)
+            n += 1
+            for col in cols.values():
+                if len(col) < n:
+                    col.append(None)
+    return pd.DataFrame(cols, copy=False)
+
+
+def extract_numeric_rating(s: pd.Series) -> pd.Series:
+    """Extract leading numeric per cell (e.g. 7 from '7: Accept'); NA where none."""
+    if pd.api.types.is_numeric_dtype(s):
+        return pd.to_numeric(s, errors="coerce").astype("Float64")
+    return s.astype("string").str.extract(_NUM_RE.pattern, expand=False).astype("Float64")
+
+
+def count_words(df: pd.DataFrame) -> pd.Series:
+    """Approximate word count per row over all string `content.*` cells."""
+    wc = pd.Series(0, index=df.index, dtype="int64")
+    for c in df.columns:
+        if not str(c).startswith("content.") or pd.api.types.is_numeric_dtype(df[c]):
+            continue
+        try:
+            # object dtype keeps Python `re` semantics; non-string cells count as NaN
+            counts = df[c].astype(object).str.count(_WORD_RE)
+        except AttributeError:  # no string values at all
+            continue
+        wc += pd.to_numeric(counts, errors="coerce").fillna(0).astype("int64")
+    return wc
 
 
-def _safe_str(v) -> str:
-    return "" if pd.isna(v) else str(v)
+def write_parquet(df: pd.DataFrame, p: Path) -> None:
+    """Write a Snappy Parquet copy of a CSV output; skipped without pyarrow."""
+    if pq is None:
+        return
+    df.to_parquet(p, index=False, compression="snappy")
+
+
+def snip(s: str, n: int = 100) -> str:
+    # collapse whitespace on a bounded prefix only; long review bodies fall
+    # back to the full string just when the prefix is mostly whitespace
+    head = _WS_RE.sub(" ", s[: n * 4]).strip()
+    if len(head) <= n and len(s) > n * 4:
+        head = _WS_RE.sub(" ", s).strip()
+    return (head[:n] + "…") if len(head) > n else head
+
+
+def coalesce(df: pd.DataFrame, cols: List[str]) -> pd.Series:
+    """Row-wise first non-empty value across `cols` (like `a or b or c`); missing -> None."""
+    out = pd.Series(None, index=df.index, dtype=object)
+    for c in cols:
+        if c not in df.columns:
+            continue
+        v = df[c].astype(object)
+        v = v.where(v.notna(), None)
+        out = out.where(out.notna(), v.where(v != "", None))
+    return out
 
 
 # ---------- threading helpers ----------
+@njit(cache=True)
+def _bfs_depth(indptr: np.ndarray, indices: np.ndarray, roots: np.ndarray) -> np.ndarray:
+    """Multi-source BFS over a CSR child graph; unreachable nodes get -1."""
+    n = indptr.shape[0] - 1
+    depth = np.full(n, -1, np.int32)
+    queue = np.empty(n, np.int32)
+    head = 0
+    tail = 0
+    for r in roots:
+        if depth[r] < 0:
+            depth[r] = 0
+            queue[tail] = r
+            tail += 1
+    while head < tail:
+        u = queue[head]
+        head += 1
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            if depth[v] < 0:
+                depth[v] = depth[u] + 1
+                queue[tail] = v
+                tail += 1
+    return depth
+
+
 def build_threads(df: pd.DataFrame) -> Tuple[Dict[str, List[str]], Dict[str, int], Dict[str, int]]:
     """
     Build global child map & depth by BFS. Also compute max depth per forum.
@@ -66,38 +227,41 @@ def build_threads(df: pd.DataFrame) -> Tuple[Dict[str, List[str]], Dict[str, int
     if df.empty:
         return {}, {}, {}
 
-    id_to_row = {str(r.get("id")): r for _, r in df.iterrows()}
+    ids = df["id"].astype(str).to_numpy()
+    if "replyto" in df.columns:
+        # normalise NaN / pd.NA to None so the loop below is a plain identity check
+        replyto = df["replyto"].astype(object)
+        parents = replyto.where(replyto.notna(), None).to_numpy()
+    else:
+        parents = np.full(len(df), None)
+    ids_set = set(ids)
     children: Dict[str, List[str]] = defaultdict(list)
-    roots = set(id_to_row.keys())
+    roots = set(ids_set)
 
-    for _id, row in id_to_row.items():
-        parent = row.get("replyto")
-        if pd.notna(parent):
+    # one entry per unique id: first-seen order, replyto from its last row
+    for nid, parent in dict(zip(ids, parents)).items():
+        if parent is not None:
             p = str(parent)
-            if p in id_to_row:
-                children[p].append(str(_id))
-                roots.discard(str(_id))
-
-    depth: Dict[str, int] = {}
-    for root in list(roots):
-        if root not in id_to_row:
-            continue
-        q = deque([(root, 0)])
-        while q:
-            nid, d = q.popleft()
-            if nid in depth:
-                continue
-            depth[nid] = d
-            for ch in children.get(nid, []):
-                q.append((ch, d + 1))
+            if p in ids_set:
+                children[p].append(nid)
+                roots.discard(nid)
+
+    # BFS over integer CSR adjacency (JIT-compiled when numba is installed)
+    nodes = list(dict.fromkeys(ids))
+    id2i = {nid: i for i, nid in enumerate(nodes)}
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int32)
+    indptr[1:] = np.cumsum([len(children.get(nid, ())) for nid in nodes])
+    indices = np.fromiter((id2i[ch] for nid in nodes for ch in children.get(nid, ())),
+                          dtype=np.int32, count=int(indptr[-1]))
+    root_idx = np.fromiter((id2i[r] for r in roots), dtype=np.int32, count=len(roots))
+    node_depth = _bfs_depth(indptr, indices, root_idx)
+    depth: Dict[str, int] = {nid: int(d) for nid, d in zip(nodes, node_depth) if d >= 0}
 
     forum_max_depth: Dict[str, int] = {}
     if "forum" in df.columns:
-        for fid, group in df.groupby("forum"):
-            md = 0
-            for nid in group["id"].astype(str).tolist():
-                md = max(md, depth.get(str(nid), 0))
-            forum_max_depth[str(fid)] = md
+        node_depth = pd.Series(ids, index=df.index).map(depth).fillna(0)
+        per_forum = node_depth.groupby(df["forum"]).max().astype(int)
+        forum_max_depth = {str(fid): int(md) for fid, md in per_forum.items()}
     return children, depth, forum_max_depth
 
 
@@ -110,6 +274,7 @@ def summarize_threads(df_reviews: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
 
     children, depth, forum_max_depth = build_threads(df_reviews)
 
+    content_cols = [c for c in df_reviews.columns if str(c).startswith("content.")]
     rows = []
     md_lines = ["## Sample threads (truncated)", ""]
     for forum, g in df_reviews.groupby("paper_forum"):
@@ -132,37 +297,40 @@ def summarize_threads(df_reviews: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
             # pick any node as root if we don't detect a root
             roots = [next(iter(ids))]
 
-        by_id = {str(r["id"]): r for _, r in g.iterrows()}
-
-        def snip(s: str, n: int = 100) -> str:
-            s = re.sub(r"\s+", " ", s).strip()
-            return (s[:n] + "…") if len(s) > n else s
-
-        def dfs(nid: str, indent: int = 0, limit_children: int = 8):
-            r = by_id.get(nid)
-            # ---- FIX for "truth value of a Series is ambiguous"
-            if r is None or (hasattr(r, "empty") and r.empty):
-                return
-            text_fields = [k for k in r.keys() if str(k).startswith("content.") and isinstance(r[k], str)]
+        # id -> tuple of content.* values, so the walk below never touches pandas
+        ids_arr = g["id"].astype(str).to_numpy()
+        mat = g[content_cols].to_numpy(dtype=object, copy=False)
+        by_id = dict(zip(ids_arr, map(tuple, mat)))
+
+        # depth-first walk with an explicit stack (deep threads would hit the recursion limit)
+        stack = [(str(roots[0]), 0)]
+        seen = set()  # replyto cycles (a -> a, a <-> b) would otherwise loop forever
+        while stack:
+            nid, indent = stack.pop()
+            values = by_id.get(nid)
+            if values is None or nid in seen:
+                continue
+            seen.add(nid)
             sample = ""
-            for k in text_fields:
-                if r[k]:
-                    sample = snip(str(r[k]))
+            for v in values:
+                if isinstance(v, str) and v:
+                    sample = snip(v)
                     if sample:
                         break
             md_lines.append("  " * indent + f"- `{nid}` depth={depth.get(nid,0)}  {sample}")
-            # Only traverse children inside this forum
-            for ch in children.get(nid, []):
+            # Only traverse children inside this forum; reversed keeps pre-order
+            for ch in reversed(children.get(nid, [])):
                 if ch in by_id:
-                    dfs(ch, indent + 1, limit_children)
-
-        dfs(str(roots[0]), 0, 8)
+                    stack.append((ch, indent + 1))
         md_lines.append("")
         if len(md_lines) > 60:  # keep markdown short
             break
 
     thread_df = pd.DataFrame(rows).sort_values(["n_reviews", "max_depth"], ascending=[False, False])
-    return thread_df, "\n".join(md_lines) + "\n"
+    buf = io.StringIO()
+    buf.write("\n".join(md_lines))
+    buf.write("\n")
+    return thread_df, buf.getvalue()
 
 
 # ---------- main analysis ----------
@@ -171,10 +339,11 @@ def main(indir: str, outdir: str):
     OUT = Path(outdir)
     OUT.mkdir(parents=True, exist_ok=True)
 
-    subs  = read_jsonl(IN / "submissions.jsonl")
-    revs  = read_jsonl(IN / "reviews.jsonl")
-    metas = read_jsonl(IN / "meta_reviews.jsonl")
-    decs  = read_jsonl(IN / "decisions.jsonl")
+    subs  = read_jsonl(IN / "submissions.jsonl", fields={"id", "forum", "content.title"})
+    revs  = read_jsonl(IN / "reviews.jsonl", fields={"id", "forum", "replyto", "paper_forum", "content.*"})
+    metas = read_jsonl(IN / "meta_reviews.jsonl", fields={"id"})
+    decs  = read_jsonl(IN / "decisions.jsonl",
+                       fields={"id", "forum", "paper_forum", "decision", "content.decision", "content.Decision"})
 
     n_sub, n_rev, n_meta, n_dec = map(len, (subs, revs, metas, decs))
 
@@ -191,15 +360,14 @@ def main(indir: str, outdir: str):
 
     # attach decisions (if available)
     if not decs.empty:
-        dec_map = {}
-        for _, r in decs.iterrows():
-            fid = _safe_str(r.get("paper_forum") or r.get("forum") or r.get("id"))
-            dec = r.get("content.decision") or r.get("content.Decision") or r.get("decision") or ""
-            dec_map[fid] = dec
+        fid = coalesce(decs, ["paper_forum", "forum", "id"]).fillna("").astype(str)
+        dec = coalesce(decs, ["content.decision", "content.Decision", "decision"]).fillna("")
+        dec_map = dict(zip(fid, dec))
         by_forum["decision"] = by_forum["paper_forum"].astype(str).map(dec_map)
 
     by_forum.sort_values("n_reviews", ascending=False, inplace=True)
     by_forum.to_csv(OUT / "reviews_by_paper.csv", index=False)
+    write_parquet(by_forum, OUT / "reviews_by_paper.parquet")
 
     # distribution of #reviews per paper
     dist = by_forum["n_reviews"].value_counts().sort_index()
@@ -212,7 +380,7 @@ def main(indir: str, outdir: str):
     if rating_cols:
         nums = []
         for col in rating_cols:
-            series = revs[col].map(extract_numeric_rating).dropna()
+            series = extract_numeric_rating(revs[col]).dropna()
             if not series.empty:
                 nums.append(series.rename(col))
         if nums:
@@ -220,16 +388,11 @@ def main(indir: str, outdir: str):
 
     # review length (approx words) & simple enrichment
     if not revs.empty:
-        def word_count_row(row) -> int:
-            text_fields = [k for k in row.index if str(k).startswith("content.") and isinstance(row[k], str)]
-            if not text_fields:
-                return 0
-            s = " ".join(str(row[k]) for k in text_fields if isinstance(row[k], str))
-            return len(re.findall(r"\w+", s))
-
-        revs["_word_count"] = revs.apply(word_count_row, axis=1)
+        revs["_word_count"] = count_words(revs)
         revs["_has_replyto"] = revs["replyto"].notna() if "replyto" in revs.columns else False
-        revs[["_word_count", "paper_forum", "replyto"]].to_csv(OUT / "reviews_enriched.csv", index=False)
+        enriched = revs[["_word_count", "paper_forum", "replyto"]]
+        enriched.to_csv(OUT / "reviews_enriched.csv", index=False)
+        write_parquet(enriched, OUT / "reviews_enriched.parquet")
         revs["_word_count"].describe().to_csv(OUT / "review_length_summary.csv")
 
     # decision breakdown
@@ -243,21 +406,21 @@ def main(indir: str, outdir: str):
     (OUT / "sample_threads.md").write_text(sample_threads_md, encoding="utf-8")
 
     # summary markdown
-    lines = []
-    lines.append(f"# OpenReview analysis for `{IN}`\n")
-    lines.append(f"- **submissions**: {n_sub}")
-    lines.append(f"- **reviews**: {n_rev}")
-    lines.append(f"- **meta_reviews**: {n_meta}")
-    lines.append(f"- **decisions**: {n_dec}\n")
-    lines.append("## Reviews per paper (top 10)\n")
+    buf = io.StringIO()
+    buf.write(f"# OpenReview analysis for `{IN}`\n\n")
+    buf.write(f"- **submissions**: {n_sub}\n")
+    buf.write(f"- **reviews**: {n_rev}\n")
+    buf.write(f"- **meta_reviews**: {n_meta}\n")
+    buf.write(f"- **decisions**: {n_dec}\n\n")
+    buf.write("## Reviews per paper (top 10)\n\n")
     if not by_forum.empty:
         cols = ["paper_forum", "n_reviews"]
         if "title" in by_forum.columns: cols.append("title")
         if "decision" in by_forum.columns: cols.append("decision")
-        lines.append(by_forum[cols].head(10).to_csv(index=False))
+        by_forum[cols].head(10).to_csv(buf, index=False)
     else:
-        lines.append("_No reviews found._\n")
-    (OUT / "summary.md").write_text("\n".join(lines), encoding="utf-8")
+        buf.write("_No reviews found._\n")
+    (OUT / "summary.md").write_text(buf.getvalue(), encoding="utf-8")
 
     print(f"Done. Report in: {OUT}")
 
@@ -14,12 +14,17 @@ uv run python .\download_openreview_pdfs.py ^
 from __future__ import annotations
 
 import argparse
+import functools
 import os
+import shutil
 import sys
 import time
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from typing import Callable, Dict, Iterator, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 from slugify import slugify
 
 try:
@@ -42,7 +47,9 @@ def _get_env(name: str) -> str:
         raise RuntimeError(f"Missing environment variable {name}. Set it in .env or your shell.")
     return v
 
+@functools.lru_cache(maxsize=1)
 def _client() -> openreview.api.OpenReviewClient:
+    """Log in once per process; download_venue calls reuse the same client."""
     username = _get_env("OPENREVIEW_USERNAME")
     password = _get_env("OPENREVIEW_PASSWORD")
     return openreview.api.OpenReviewClient(
@@ -117,71 +124,109 @@ def _get_pdf_url(note) -> Optional[str]:
     return None
 
 def download_file(session: requests.Session, url: str, out_path: str) -> bool:
+    # already fetched by an earlier run; never replace a PDF a parser may have open
+    if os.path.exists(out_path) and os.path.getsize(out_path) > 1024:
+        return True
+    # write to a .part file and rename on success, so readers only ever see complete PDFs
+    part_path = out_path + ".part"
     try:
         with session.get(url, stream=True, timeout=60) as r:
             r.raise_for_status()
-            with open(out_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=1024 * 64):
-                    if chunk:
-                        f.write(chunk)
+            r.raw.decode_content = True
+            with open(part_path, "wb") as f:
+                shutil.copyfileobj(r.raw, f, length=1024 * 1024)
+        os.replace(part_path, out_path)
         return True
     except Exception as e:
         print(f"WARNING: Download failed {url}: {e}")
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
         return False
 
-def main():
-    p = argparse.ArgumentParser(description="Download PDFs from OpenReview for a venue")
-    p.add_argument("--venue", required=True, help='e.g., "ICLR.cc/2024/Conference"')
-    p.add_argument("--accepted-only", action="store_true", help="Only download accepted papers")
-    p.add_argument("--max-papers", type=int, default=50, help="Max papers to download")
-    p.add_argument("--out", default=os.path.join("data", "pdfs"), help="Output folder for PDFs")
-    args = p.parse_args()
-
-    os.makedirs(args.out, exist_ok=True)
+def download_venue(
+    venue: str,
+    out_dir: str,
+    max_papers: int = 50,
+    accepted_only: bool = False,
+    workers: int = 8,
+    on_saved: Optional[Callable[[str], None]] = None,
+) -> int:
+    """
+    Download up to `max_papers` PDFs of `venue` into `out_dir` and return how
+    many were saved. `on_saved(path)` is called (from the calling thread) as
+    soon as each PDF is complete on disk.
+    """
+    os.makedirs(out_dir, exist_ok=True)
     client = _client()
     print(f"Login OK as: {client.profile.id if client.profile else 'anonymous'}")
 
     # pick submission invitation dynamically
-    sub_inv = _pick_submission_invitation(client, args.venue)
+    sub_inv = _pick_submission_invitation(client, venue)
     print(f"Using submission invitation: {sub_inv}")
 
     submissions = client.get_all_notes(invitation=sub_inv)
-    print(f"Found {len(submissions)} submissions under {args.venue}")
+    print(f"Found {len(submissions)} submissions under {venue}")
 
-    decisions_map = _fetch_decisions(client, args.venue) if args.accepted_only else {}
+    decisions_map = _fetch_decisions(client, venue) if accepted_only else {}
     count = 0
 
     # requests session with auth header
     session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
     if client.token:
         session.headers.update({"Authorization": f"Bearer {client.token}"})
 
-    for n in submissions:
-        if args.accepted_only:
-            dec = decisions_map.get(n.forum, "")
-            if not _is_accepted(dec):
+    def iter_jobs() -> Iterator[Tuple[str, str]]:
+        for n in submissions:
+            if accepted_only:
+                dec = decisions_map.get(n.forum, "")
+                if not _is_accepted(dec):
+                    continue
+
+            title = ""
+            c = n.content or {}
+            if "title" in c:
+                val = c["title"]
+                title = val.get("value") if isinstance(val, dict) else str(val)
+            stem = _safe_stem(title, n.id)
+
+            pdf_url = _get_pdf_url(n)
+            if not pdf_url:
+                print(f"SKIP (no PDF field): {stem}")
                 continue
+            yield pdf_url, os.path.join(out_dir, f"{stem}.pdf")
+
+    # downloads are independent I/O; submit only as many as are still needed
+    # so failed ones get replaced by the next candidates
+    jobs = iter_jobs()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        while count < max_papers:
+            batch = list(islice(jobs, max_papers - count))
+            if not batch:
+                break
+            futs = {ex.submit(download_file, session, url, out_path): out_path for url, out_path in batch}
+            for fut in as_completed(futs):
+                if fut.result():
+                    count += 1
+                    print(f"Saved {count} -> {futs[fut]}")
+                    if on_saved is not None:
+                        on_saved(futs[fut])
+    return count
 
-        title = ""
-        c = n.content or {}
-        if "title" in c:
-            val = c["title"]
-            title = val.get("value") if isinstance(val, dict) else str(val)
-        stem = _safe_stem(title, n.id)
-
-        pdf_url = _get_pdf_url(n)
-        if not pdf_url:
-            print(f"SKIP (no PDF field): {stem}")
-            continue
-
-        out_path = os.path.join(args.out, f"{stem}.pdf")
-        ok = download_file(session, pdf_url, out_path)
-        if ok:
-            count += 1
-            print(f"Saved {count} -> {out_path}")
-        if count >= args.max_papers:
-            break
+def main():
+    p = argparse.ArgumentParser(description="Download PDFs from OpenReview for a venue")
+    p.add_argument("--venue", required=True, help='e.g., "ICLR.cc/2024/Conference"')
+    p.add_argument("--accepted-only", action="store_true", help="Only download accepted papers")
+    p.add_argument("--max-papers", type=int, default=50, help="Max papers to download")
+    p.add_argument("--out", default=os.path.join("data", "pdfs"), help="Output folder for PDFs")
+    p.add_argument("--workers", type=int, default=8, help="Parallel download threads")
+    args = p.parse_args()
 
+    count = download_venue(args.venue, args.out, args.max_papers, args.accepted_only, args.workers)
     print(f"Done. Saved {count} PDFs -> {args.out}")
 
 if __name__ == "__main__":
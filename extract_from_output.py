@@ -1,17 +1,25 @@
-﻿import json, pathlib as P
+﻿import re, pathlib as P
+try: from orjson import loads
+except ImportError: from json import loads
+FORUM_RE = re.compile(rb'"forum"\s*:\s*"([^"]+)"')
 OUT = P.Path(r"data\demo50")
 ids, seen = [], set()
 for fn in ("submissions.jsonl","reviews.jsonl"):
     p = OUT / fn
     if not p.exists(): continue
-    with open(p,"r",encoding="utf-8",errors="ignore") as f:
+    with open(p,"rb") as f:
         for line in f:
-            try: o = json.loads(line)
-            except: continue
-            fid = o.get("forum") or o.get("paper_forum")
+            # cheap regex on raw bytes first; full parse only when it misses
+            m = FORUM_RE.search(line)
+            if m: fid = m.group(1).decode("utf-8","ignore")
+            else:
+                try: o = loads(line)
+                except: continue
+                fid = o.get("forum") or o.get("paper_forum")
             if fid and fid not in seen:
                 seen.add(fid); ids.append(fid)
             if len(ids) >= 50: break
+    if len(ids) >= 50: break
 open("ids_link50.txt","w",encoding="utf-8").write("\n".join(ids))
 open("links_link50.txt","w",encoding="utf-8").write("\n".join(f"https://openreview.net/forum?id={i}" for i in ids))
 print("Wrote",len(ids),"ids -> ids_link50.txt")
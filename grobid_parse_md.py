@@ -14,61 +14,101 @@ uv run python .\grobid_parse_md.py ^
   --in-dir .\data\pdfs ^
   --tei-dir .\data\tei ^
   --out-md .\out\md_grobid ^
-  --threads 2
+  --threads 4
+
+--threads defaults to min(cpu_count, 8). Requests are bound by the GROBID
+server, so raise it for a larger server or lower it if GROBID returns 503.
 """
 from __future__ import annotations
 
 import argparse
+import io
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import requests
+from requests.adapters import HTTPAdapter
 from lxml import etree
 from tqdm import tqdm
 
 NS = {"tei": "http://www.tei-c.org/ns/1.0"}
 
+# One keep-alive session shared by all worker threads; see configure_session().
+SESSION = requests.Session()
+
+def configure_session(pool_size: int) -> None:
+    """
+    Size the connection pool so every worker thread can hold its own
+    keep-alive connection to GROBID instead of reconnecting per PDF.
+    """
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    SESSION.mount("http://", adapter)
+    SESSION.mount("https://", adapter)
+
 def post_grobid(grobid_url: str, pdf_path: str, timeout: int = 180) -> bytes:
     """
     POST the PDF to /api/processFulltextDocument and return raw TEI bytes.
     """
     endpoint = grobid_url.rstrip("/") + "/api/processFulltextDocument"
-    files = {"input": open(pdf_path, "rb")}
     data = {"consolidateCitations": "0"}
-    try:
-        with requests.post(endpoint, files=files, data=data, timeout=timeout) as r:
+    with open(pdf_path, "rb") as fh:
+        files = {"input": (os.path.basename(pdf_path), fh, "application/pdf")}
+        with SESSION.post(endpoint, files=files, data=data, timeout=timeout) as r:
             r.raise_for_status()
             return r.content
-    finally:
-        files["input"].close()
 
 def tei_to_markdown(tei_bytes: bytes) -> str:
     """
     A very simple TEI -> Markdown conversion:
     - extract title, headings, and paragraphs
     - join them as Markdown
-    """
-    md_lines = []
-    parser = etree.XMLParser(recover=True)
-    root = etree.fromstring(tei_bytes, parser=parser)
-
-    # Title
-    title = root.xpath("//tei:titleStmt/tei:title/text()", namespaces=NS)
-    if title:
-        md_lines.append(f"# {title[0].strip()}")
-        md_lines.append("")
 
-    # Sections: head + p
-    for div in root.xpath("//tei:div", namespaces=NS):
-        heads = div.xpath("./tei:head/text()", namespaces=NS)
+    The TEI is parsed in a single streaming pass; each outermost <div> is
+    converted and then freed, so memory stays bounded on long papers.
+    """
+    tei = "{%s}" % NS["tei"]
+    title = None
+    sections = []    # one list of lines per <div>, in document order
+    open_divs = []   # indices into `sections` of the <div>s being parsed
+
+    events = etree.iterparse(io.BytesIO(tei_bytes), events=("start", "end"),
+                             tag=(f"{tei}div", f"{tei}title"), recover=True)
+    for ev, elem in events:
+        if elem.tag == f"{tei}title":
+            parent = elem.getparent()
+            if ev == "end" and title is None and parent is not None and parent.tag == f"{tei}titleStmt":
+                text = elem.xpath("text()")
+                if text:
+                    title = text[0].strip()
+            continue
+        if ev == "start":
+            open_divs.append(len(sections))
+            sections.append([])
+            continue
+
+        # Sections: head + p
+        lines = sections[open_divs.pop()]
+        heads = elem.xpath("./tei:head/text()", namespaces=NS)
         if heads:
-            md_lines.append(f"## {heads[0].strip()}")
-        # paragraphs
-        for p in div.xpath(".//tei:p", namespaces=NS):
+            lines.append(f"## {heads[0].strip()}")
+        # paragraphs (nested divs are still attached, as with //tei:div)
+        for p in elem.iter(f"{tei}p"):
             txt = " ".join(p.itertext()).strip()
             if txt:
-                md_lines.append(txt)
+                lines.append(txt)
+        lines.append("")
+        if not open_divs:
+            # outermost div done: drop it and its already-processed siblings
+            elem.clear(keep_tail=True)
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+    md_lines = []
+    if title is not None:
+        md_lines.append(f"# {title}")
         md_lines.append("")
+    for lines in sections:
+        md_lines.extend(lines)
 
     md = "\n".join(md_lines).strip() + "\n"
     return md
@@ -102,7 +142,8 @@ def main():
     p.add_argument("--in-dir", default=os.path.join("data", "pdfs"))
     p.add_argument("--tei-dir", default=os.path.join("data", "tei"))
     p.add_argument("--out-md", default=os.path.join("out", "md_grobid"))
-    p.add_argument("--threads", type=int, default=2)
+    p.add_argument("--threads", type=int, default=min(os.cpu_count() or 4, 8),
+                   help="Concurrent GROBID requests (default: min(cpu_count, 8))")
     args = p.parse_args()
 
     pdfs = []
@@ -117,6 +158,7 @@ def main():
     print(f"GROBID server: {args.grobid_url}")
     print(f"Found {len(pdfs)} PDF(s) to process")
 
+    configure_session(args.threads * 2)
     failures = 0
     with ThreadPoolExecutor(max_workers=args.threads) as ex:
         futs = [ex.submit(process_one, args.grobid_url, p, args.tei_dir, args.out_md) for p in pdfs]
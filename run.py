@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
-import argparse, os, json, time, re
+import argparse, os, json, functools, operator, shutil, time, re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 import pandas as pd
 from tqdm import tqdm
@@ -10,8 +13,40 @@ from tqdm import tqdm
 import openreview
 from openreview import tools as or_tools
 
+try:
+    import ahocorasick
+except ImportError:  # optional; build_classifier falls back to substring scans
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib json encoder
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # optional; write_csv falls back to pandas to_csv
+    pa = pacsv = None
+
+def dumps_json(obj: Any, indent: bool = False, newline: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes (orjson when installed), optionally newline-terminated."""
+    if orjson is not None:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_APPEND_NEWLINE if newline else 0)
+        return orjson.dumps(obj, option=option)
+    out = json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+    return out + b"\n" if newline else out
+
+# Shared keep-alive session for PDF downloads (one pooled connection per worker)
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+
+# read .env once per process rather than on every login
+load_dotenv()
+
+@functools.lru_cache(maxsize=4)
 def env_login(baseurl: str) -> openreview.Client:
-    load_dotenv()
+    """Return a logged-in client; cached per baseurl so repeat calls skip the login handshake."""
     token = os.getenv("OPENREVIEW_TOKEN")
     user = os.getenv("OPENREVIEW_USERNAME")
     pwd = os.getenv("OPENREVIEW_PASSWORD")
@@ -21,9 +56,11 @@ def env_login(baseurl: str) -> openreview.Client:
         return openreview.Client(baseurl=baseurl, username=user, password=pwd)
     return openreview.Client(baseurl=baseurl)
 
+# space, "/" and backslash are outside the allowed set, so one substitution covers them too
+_SANITIZE_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
 def sanitize(s: str) -> str:
-    s = s.strip().replace(" ", "_").replace("/", "_").replace("\\", "_")
-    return re.sub(r"[^A-Za-z0-9_.-]", "_", s)
+    return _SANITIZE_RE.sub("_", s.strip())
 
 def ensure_dir(p: Path):
     p.mkdir(parents=True, exist_ok=True)
@@ -34,25 +71,37 @@ def flat_content(note: openreview.Note) -> Dict[str, Any]:
         for k,v in note.content.items():
             if isinstance(v, (str, int, float, bool)) or v is None:
                 c[f"content.{k}"] = v
+            elif (isinstance(v, dict) and len(v) == 1 and "value" in v
+                  and (isinstance(v["value"], (str, int, float, bool)) or v["value"] is None)):
+                # API v2 {"value": scalar} wrapper: keep the scalar itself
+                c[f"content.{k}"] = v["value"]
             else:
                 try:
-                    c[f"content.{k}"] = json.dumps(v, ensure_ascii=False)
+                    c[f"content.{k}"] = dumps_json(v).decode("utf-8")
                 except Exception:
                     c[f"content.{k}"] = str(v)
     return c
 
+_NOTE_FIELDS = ("forum", "replyto", "invitation", "signatures", "readers", "writers", "tcdate", "tmdate", "cdate")
+_get_note_fields = operator.attrgetter(*_NOTE_FIELDS)
+
 def note_to_row(note: openreview.Note) -> Dict[str, Any]:
+    try:
+        fields = _get_note_fields(note)
+    except AttributeError:  # partial note objects: fall back to per-field defaults
+        fields = tuple(getattr(note, name, None) for name in _NOTE_FIELDS)
+    forum, replyto, invitation, signatures, readers, writers, tcdate, tmdate, cdate = fields
     base = {
         "id": note.id,
-        "forum": getattr(note, "forum", None),
-        "replyto": getattr(note, "replyto", None),
-        "invitation": getattr(note, "invitation", None),
-        "signatures": ",".join(getattr(note, "signatures", []) or []),
-        "readers": ",".join(getattr(note, "readers", []) or []),
-        "writers": ",".join(getattr(note, "writers", []) or []),
-        "tcdate": int(getattr(note, "tcdate", 0) or 0),
-        "tmdate": int(getattr(note, "tmdate", 0) or 0),
-        "date": int(getattr(note, "cdate", 0) or 0),
+        "forum": forum,
+        "replyto": replyto,
+        "invitation": invitation,
+        "signatures": ",".join(signatures or []),
+        "readers": ",".join(readers or []),
+        "writers": ",".join(writers or []),
+        "tcdate": int(tcdate or 0),
+        "tmdate": int(tmdate or 0),
+        "date": int(cdate or 0),
     }
     base.update(flat_content(note))
     return base
@@ -61,39 +110,108 @@ def iter_submissions(client: openreview.Client, venue: str, inv_suffixes: List[s
     results = []
     seen_ids = set()
     for suf in inv_suffixes:
+        remaining = limit - len(results)
+        if remaining <= 0:
+            break
         invitation = f"{venue}/-/{suf}"
         try:
-            for n in or_tools.iterget_notes(client, invitation=invitation, details="replies"):
-                if n.id not in seen_ids:
-                    results.append(n)
-                    seen_ids.add(n.id)
-                    if len(results) >= limit:
-                        return results
+            notes = or_tools.iterget_notes(client, invitation=invitation, details="replies")
+            # islice stops pulling pages from the API as soon as the cap is reached
+            for n in islice((n for n in notes if n.id not in seen_ids), remaining):
+                results.append(n)
+                seen_ids.add(n.id)
         except openreview.OpenReviewException:
             continue
     return results
 
-def fetch_children(client: openreview.Client, forum_id: str) -> List[openreview.Note]:
-    try:
-        return client.get_all_notes(forum=forum_id)
-    except Exception:
-        return []
+def fetch_children(client: openreview.Client, forum_ids: List[str], workers: int = 16) -> Dict[str, List[openreview.Note]]:
+    """Fetch all notes of each forum concurrently; failed forums map to []."""
+    def fetch_one(forum_id: str) -> List[openreview.Note]:
+        try:
+            return client.get_all_notes(forum=forum_id)
+        except Exception:
+            return []
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        results = list(tqdm(ex.map(fetch_one, forum_ids), total=len(forum_ids), ncols=80))
+    return dict(zip(forum_ids, results))
+
+def embedded_replies(note: openreview.Note) -> Optional[List[openreview.Note]]:
+    """Forum replies already returned with the submission (details="replies"), or None."""
+    replies = (getattr(note, "details", None) or {}).get("replies")
+    if replies is None:
+        return None
+    return [r if isinstance(r, openreview.Note) else openreview.Note.from_json(r) for r in replies]
+
+def coalesce(df: pd.DataFrame, cols: List[str]) -> pd.Series:
+    """Row-wise first non-empty value across `cols` (like `a or b or c`); missing -> None."""
+    out = pd.Series(None, index=df.index, dtype=object)
+    for c in cols:
+        if c not in df.columns:
+            continue
+        v = df[c].astype(object)
+        v = v.where(v.notna(), None)
+        out = out.where(out.notna(), v.where(v != "", None))
+    return out
+
+def build_classifier(frags_by_kind: Dict[str, List[str]]) -> Callable[[str], Optional[str]]:
+    """
+    Return inv -> kind for the first kind (in dict order) with a fragment
+    occurring in the invitation, or None. With pyahocorasick installed all
+    fragments are matched in a single pass over the string.
+    """
+    kinds = list(frags_by_kind)
+    if ahocorasick is None or not any(frags_by_kind.values()):
+        def classify(inv: str) -> Optional[str]:
+            for kind in kinds:
+                if any(frag in inv for frag in frags_by_kind[kind]):
+                    return kind
+            return None
+        return classify
+
+    automaton = ahocorasick.Automaton()
+    for rank, kind in enumerate(kinds):
+        for frag in frags_by_kind[kind]:
+            if not automaton.exists(frag):  # keep the higher-priority kind
+                automaton.add_word(frag, rank)
+    automaton.make_automaton()
+
+    def classify(inv: str) -> Optional[str]:
+        rank = min((r for _, r in automaton.iter(inv)), default=None)
+        return None if rank is None else kinds[rank]
+    return classify
+
+def write_csv(df: pd.DataFrame, path: Path):
+    """Write df as CSV through pyarrow's C++ writer when installed, else pandas."""
+    if pacsv is not None:
+        try:
+            pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), str(path))
+            return
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass  # object column mixing Python types (e.g. str and list); pandas copes
+    df.to_csv(path, index=False)
 
 def save_jsonl(path: Path, rows: List[Dict[str, Any]]):
-    with path.open("w", encoding="utf-8") as f:
-        for r in rows:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    with path.open("wb", buffering=1 << 20) as f:
+        f.writelines(dumps_json(r, newline=True) for r in rows)
 
-def download_pdf(note: openreview.Note, outdir: Path) -> bool:
+def download_pdf(note: openreview.Note, outdir: Path, session: requests.Session) -> bool:
     pdf_url = f"https://openreview.net/pdf?id={note.id}"
     outpath = outdir / f"{sanitize(note.id)}.pdf"
+    # already fetched by an earlier run (partial downloads never get the final name)
+    if outpath.exists() and outpath.stat().st_size > 1024:
+        return True
+    partpath = outpath.with_suffix(".pdf.part")
     try:
-        r = requests.get(pdf_url, timeout=30)
-        if r.status_code == 200 and r.headers.get("content-type","").lower().startswith("application/pdf"):
-            outpath.write_bytes(r.content)
-            return True
+        with session.get(pdf_url, stream=True, timeout=30) as r:
+            if r.status_code == 200 and r.headers.get("content-type","").lower().startswith("application/pdf"):
+                r.raw.decode_content = True
+                with partpath.open("wb") as f:
+                    shutil.copyfileobj(r.raw, f, length=1 << 20)
+                os.replace(partpath, outpath)
+                return True
     except Exception:
-        pass
+        partpath.unlink(missing_ok=True)
     return False
 
 def main():
@@ -105,6 +223,8 @@ def main():
     parser.add_argument("--with-pdfs", action="store_true", help="Also download PDFs")
     parser.add_argument("--summary-csv", action="store_true", help="Write CSV summary per paper")
     parser.add_argument("--baseurl", type=str, default="https://api.openreview.net")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent OpenReview requests")
+    parser.add_argument("--pdf-workers", type=int, default=8, help="Concurrent PDF downloads (with --with-pdfs)")
     parser.add_argument("--inv-suffix", type=str, default="Blind_Submission,Submission",
                         help="Comma-separated invitation suffixes to try, in order.")
     parser.add_argument("--review-names", type=str, default="Official_Review,Review",
@@ -148,19 +268,26 @@ def main():
 
     # 3) Thread children
     review_rows, meta_rows, decision_rows = [], [], []
+    rows_by_kind = {"review": review_rows, "meta": meta_rows, "decision": decision_rows}
+    classify = build_classifier({"review": review_frags, "meta": meta_frags, "decision": decision_frags})
     print("[2/4] Fetching reviews/meta/decisions ...")
-    for n in tqdm(subs, ncols=80):
-        children = fetch_children(client, n.forum or n.id)
-        for ch in children:
-            inv = (ch.invitation or "")
+    # submissions from iter_submissions carry their replies; only fetch forums that don't
+    children_by_forum = {}
+    for n in subs:
+        replies = embedded_replies(n)
+        if replies is not None:
+            children_by_forum[n.forum or n.id] = replies
+    missing = [fid for fid in dict.fromkeys(n.forum or n.id for n in subs) if fid not in children_by_forum]
+    if missing:
+        children_by_forum.update(fetch_children(client, missing, args.workers))
+    for n in subs:
+        for ch in children_by_forum[n.forum or n.id]:
+            kind = classify(ch.invitation or "")
+            if kind is None:
+                continue
             row = note_to_row(ch)
             row["paper_forum"] = n.forum or n.id
-            if any(frag in inv for frag in review_frags):
-                review_rows.append(row)
-            elif any(frag in inv for frag in meta_frags):
-                meta_rows.append(row)
-            elif any(frag in inv for frag in decision_frags):
-                decision_rows.append(row)
+            rows_by_kind[kind].append(row)
 
     save_jsonl(outdir / "reviews.jsonl", review_rows)
     save_jsonl(outdir / "meta_reviews.jsonl", meta_rows)
@@ -170,47 +297,47 @@ def main():
     if args.with_pdfs:
         print("[3/4] Downloading PDFs ...")
         ok_cnt = 0
-        for n in tqdm(subs, ncols=80):
-            if download_pdf(n, pdf_dir):
-                ok_cnt += 1
+        with ThreadPoolExecutor(max_workers=max(1, args.pdf_workers)) as ex:
+            futs = [ex.submit(download_pdf, n, pdf_dir, SESSION) for n in subs]
+            for fut in tqdm(as_completed(futs), total=len(futs), ncols=80):
+                if fut.result():
+                    ok_cnt += 1
         print(f" -> Saved {ok_cnt} PDFs")
 
     # 5) Summary CSV
     if args.summary_csv:
         print("[4/4] Building summary.csv ...")
-        rv_by_forum, mr_by_forum, dec_by_forum = {}, {}, {}
-        for r in review_rows:
-            rv_by_forum[r["paper_forum"]] = rv_by_forum.get(r["paper_forum"], 0) + 1
-        for r in meta_rows:
-            mr_by_forum[r["paper_forum"]] = mr_by_forum.get(r["paper_forum"], 0) + 1
-        for r in decision_rows:
-            dec_by_forum[r["paper_forum"]] = r.get("content.decision") or r.get("content.Decision") or ""
-
-        rows = []
-        for s in sub_rows:
-            fid = s.get("forum") or s.get("id")
-            title = s.get("content.title") or s.get("content.Title") or ""
-            authors = s.get("content.authors") or s.get("content.Authors") or ""
-            rows.append({
-                "forum": fid,
-                "id": s.get("id",""),
-                "title": title,
-                "authors": authors,
-                "n_reviews": rv_by_forum.get(fid, 0),
-                "n_meta_reviews": mr_by_forum.get(fid, 0),
-                "decision": dec_by_forum.get(fid, ""),
-            })
-        pd.DataFrame(rows).to_csv(outdir / "summary.csv", index=False)
+        # columnar view holding only the fields the summary reads
+        subs_df = pd.DataFrame(sub_rows, columns=["id", "forum", "content.title", "content.Title",
+                                                  "content.authors", "content.Authors"])
+        rv_counts = pd.DataFrame(review_rows, columns=["paper_forum"]).groupby("paper_forum").size()
+        mr_counts = pd.DataFrame(meta_rows, columns=["paper_forum"]).groupby("paper_forum").size()
+        dec_df = pd.DataFrame(decision_rows, columns=["paper_forum", "content.decision", "content.Decision"])
+        # last decision note per forum wins
+        decisions = pd.Series(coalesce(dec_df, ["content.decision", "content.Decision"]).fillna("").to_numpy(),
+                              index=dec_df["paper_forum"].to_numpy())
+        decisions = decisions[~decisions.index.duplicated(keep="last")]
+
+        summary = pd.DataFrame({
+            "forum": coalesce(subs_df, ["forum", "id"]),
+            "id": coalesce(subs_df, ["id"]).fillna(""),
+            "title": coalesce(subs_df, ["content.title", "content.Title"]).fillna(""),
+            "authors": coalesce(subs_df, ["content.authors", "content.Authors"]).fillna(""),
+        })
+        summary["n_reviews"] = summary["forum"].map(rv_counts).fillna(0).astype(int)
+        summary["n_meta_reviews"] = summary["forum"].map(mr_counts).fillna(0).astype(int)
+        summary["decision"] = summary["forum"].map(decisions).fillna("")
+        write_csv(summary, outdir / "summary.csv")
         print(" -> Wrote summary.csv")
 
-    (outdir / "log.json").write_text(json.dumps({
+    (outdir / "log.json").write_bytes(dumps_json({
         "venue": args.venue,
         "paper_id": args.paper_id,
         "limit": args.limit,
         "outdir": str(outdir),
         "with_pdfs": bool(args.with_pdfs),
         "ts": int(time.time())
-    }, indent=2))
+    }, indent=True))
 
     print("Done. Outputs are in:", outdir)
 
@@ -5,6 +5,10 @@ Run both steps:
   1) download_openreview_pdfs.py  -> saves PDFs to --out-pdfs
   2) grobid_parse_md.py           -> parses PDFs to TEI + Markdown via GROBID
 
+By default both run in this process and overlap: each PDF is handed to the
+GROBID worker pool as soon as it is fully downloaded. Pass --sequential to
+run the two scripts one after the other as subprocesses instead.
+
 Example (Windows PowerShell):
   uv run python .\run_download_and_parse.py `
     --venue "ICLR.cc/2024/Conference" `
@@ -14,7 +18,10 @@ Example (Windows PowerShell):
     --grobid-url http://localhost:8070 `
     --tei-dir .\data\tei `
     --out-md .\out\md_grobid `
-    --threads 2
+    --threads 4
+
+--threads defaults to min(cpu_count, 8). Parsing is bound by the GROBID
+server, so raise it for a larger server or lower it if GROBID returns 503.
 """
 from __future__ import annotations
 
@@ -22,39 +29,50 @@ import argparse
 import os
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 def ensure_dir(p: str) -> str:
     Path(p).mkdir(parents=True, exist_ok=True)
     return p
 
-def main():
-    ap = argparse.ArgumentParser(description="Download PDFs from OpenReview and parse to Markdown via GROBID")
-    ap.add_argument("--venue", required=True, help='e.g., "ICLR.cc/2024/Conference"')
-    ap.add_argument("--accepted-only", action="store_true", help="Only accepted papers")
-    ap.add_argument("--max-papers", type=int, default=50)
-    ap.add_argument("--out-pdfs", default=os.path.join("data", "pdfs"))
-    ap.add_argument("--grobid-url", default="http://localhost:8070")
-    ap.add_argument("--tei-dir", default=os.path.join("data", "tei"))
-    ap.add_argument("--out-md", default=os.path.join("out", "md_grobid"))
-    ap.add_argument("--threads", type=int, default=2)
-    ap.add_argument("--python-exe", default=sys.executable, help="Python executable to use")
-    args = ap.parse_args()
+def run_pipelined(args, here: Path) -> None:
+    """Download and parse concurrently: the GROBID pool consumes PDFs as they land."""
+    sys.path.insert(0, str(here))
+    import download_openreview_pdfs as dl
+    import grobid_parse_md as gp
 
-    # Resolve scripts in the same directory as this runner
-    here = Path(__file__).resolve().parent
-    dl_script = here / "download_openreview_pdfs.py"
-    parse_script = here / "grobid_parse_md.py"
+    gp.configure_session(args.threads * 2)
+    print("=".ljust(80, "="))
+    print("STEP 1+2: Download PDFs and parse them via GROBID as they arrive")
+    print("=".ljust(80, "="))
 
-    if not dl_script.exists():
-        raise SystemExit(f"ERROR: {dl_script.name} not found next to this script.")
-    if not parse_script.exists():
-        raise SystemExit(f"ERROR: {parse_script.name} not found next to this script.")
+    futs = []
+    queued = set()
+    with ThreadPoolExecutor(max_workers=args.threads) as ex:
+        def enqueue(pdf_path: str) -> None:
+            if pdf_path not in queued:
+                queued.add(pdf_path)
+                futs.append(ex.submit(gp.process_one, args.grobid_url, pdf_path, args.tei_dir, args.out_md))
 
-    ensure_dir(args.out_pdfs)
-    ensure_dir(args.tei_dir)
-    ensure_dir(args.out_md)
+        # PDFs from earlier runs are parsed too (process_one skips finished ones)
+        for n in sorted(os.listdir(args.out_pdfs)):
+            if n.lower().endswith(".pdf"):
+                enqueue(os.path.join(args.out_pdfs, n))
+
+        saved = dl.download_venue(args.venue, args.out_pdfs, args.max_papers, args.accepted_only, on_saved=enqueue)
+        print(f"Downloaded {saved} PDFs; waiting for GROBID ...")
+
+        failures = 0
+        for fut in as_completed(futs):
+            try:
+                fut.result()
+            except Exception as e:
+                failures += 1
+                print(f"ERROR: {e}")
+    print(f"Parsed {len(futs) - failures}/{len(futs)} PDFs. Failures: {failures}")
 
+def run_sequential(args, dl_script: Path, parse_script: Path) -> None:
     # Step 1: Download PDFs
     cmd1 = [
         args.python_exe, str(dl_script),
@@ -90,6 +108,41 @@ def main():
     if r2.returncode != 0:
         raise SystemExit(f"grobid_parse_md.py failed with exit code {r2.returncode}")
 
+def main():
+    ap = argparse.ArgumentParser(description="Download PDFs from OpenReview and parse to Markdown via GROBID")
+    ap.add_argument("--venue", required=True, help='e.g., "ICLR.cc/2024/Conference"')
+    ap.add_argument("--accepted-only", action="store_true", help="Only accepted papers")
+    ap.add_argument("--max-papers", type=int, default=50)
+    ap.add_argument("--out-pdfs", default=os.path.join("data", "pdfs"))
+    ap.add_argument("--grobid-url", default="http://localhost:8070")
+    ap.add_argument("--tei-dir", default=os.path.join("data", "tei"))
+    ap.add_argument("--out-md", default=os.path.join("out", "md_grobid"))
+    ap.add_argument("--threads", type=int, default=min(os.cpu_count() or 4, 8),
+                    help="Concurrent GROBID requests (default: min(cpu_count, 8))")
+    ap.add_argument("--python-exe", default=sys.executable, help="Python executable to use (with --sequential)")
+    ap.add_argument("--sequential", action="store_true",
+                    help="Run download then parse as two subprocesses instead of overlapping them")
+    args = ap.parse_args()
+
+    # Resolve scripts in the same directory as this runner
+    here = Path(__file__).resolve().parent
+    dl_script = here / "download_openreview_pdfs.py"
+    parse_script = here / "grobid_parse_md.py"
+
+    if not dl_script.exists():
+        raise SystemExit(f"ERROR: {dl_script.name} not found next to this script.")
+    if not parse_script.exists():
+        raise SystemExit(f"ERROR: {parse_script.name} not found next to this script.")
+
+    ensure_dir(args.out_pdfs)
+    ensure_dir(args.tei_dir)
+    ensure_dir(args.out_md)
+
+    if args.sequential:
+        run_sequential(args, dl_script, parse_script)
+    else:
+        run_pipelined(args, here)
+
     print("All done.")
     print(f"PDFs     -> {args.out_pdfs}")
     print(f"TEI XML  -> {args.tei_dir}")
@@ -1,17 +1,43 @@
 ﻿import argparse, json, os
 from pathlib import Path
 import pandas as pd
+try: import pyarrow.json as paj
+except ImportError: paj = None
 
-def read_jsonl(p):
+# chỉ các cột mà phân tích bên dưới thực sự dùng
+COLUMNS = ["paper_forum","forum","id","content.title","content.decision","content.Decision"]
+
+def read_jsonl(p, columns=None):
     if not Path(p).exists(): return pd.DataFrame()
-    return pd.read_json(p, lines=True, dtype_backend="pyarrow")
+    if paj is not None:
+        try:
+            # parser C++ đa luồng của pyarrow, nhanh hơn nhiều với reviews.jsonl lớn
+            table = paj.read_json(str(p), read_options=paj.ReadOptions(block_size=1 << 24))
+            if columns is not None:
+                table = table.select([c for c in columns if c in table.column_names])
+            return table.to_pandas(types_mapper=pd.ArrowDtype)
+        except Exception:
+            pass  # vd. kiểu dữ liệu lẫn lộn giữa các dòng -> dùng pandas bên dưới
+    df = pd.read_json(p, lines=True, dtype_backend="pyarrow")
+    return df if columns is None else df[[c for c in columns if c in df.columns]]
+
+def coalesce(df, cols):
+    # giống `a or b or c` theo từng dòng, nhưng vector hoá; thiếu hết -> None
+    out = pd.Series(None, index=df.index, dtype=object)
+    for c in cols:
+        if c not in df.columns:
+            continue
+        v = df[c].astype(object)
+        v = v.where(v.notna(), None)
+        out = out.where(out.notna(), v.where(v != "", None))
+    return out
 
 def main(indir):
     out = Path("analysis"); out.mkdir(exist_ok=True)
-    subs  = read_jsonl(Path(indir)/"submissions.jsonl")
-    revs  = read_jsonl(Path(indir)/"reviews.jsonl")
-    metas = read_jsonl(Path(indir)/"meta_reviews.jsonl")
-    decs  = read_jsonl(Path(indir)/"decisions.jsonl")
+    subs  = read_jsonl(Path(indir)/"submissions.jsonl", COLUMNS)
+    revs  = read_jsonl(Path(indir)/"reviews.jsonl", COLUMNS)
+    metas = read_jsonl(Path(indir)/"meta_reviews.jsonl", COLUMNS)
+    decs  = read_jsonl(Path(indir)/"decisions.jsonl", COLUMNS)
 
     # Tổng quan
     overview = {
@@ -35,10 +61,9 @@ def main(indir):
     # Decision theo paper (nếu có)
     dec_map = {}
     if not decs.empty:
-        for _,r in decs.iterrows():
-            fid = r.get("paper_forum") or r.get("forum") or r.get("id")
-            dec = r.get("content.decision") or r.get("content.Decision") or ""
-            dec_map[fid]=dec
+        fid = coalesce(decs, ["paper_forum","forum","id"])
+        dec = coalesce(decs, ["content.decision","content.Decision"]).fillna("")
+        dec_map = dict(zip(fid.to_numpy(), dec.to_numpy()))
         grp["decision"]=grp["paper_forum"].map(dec_map)
 
     grp.sort_values("n_reviews", ascending=False, inplace=True)